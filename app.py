@@ -1,5 +1,7 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from typing import List
 import io
 import torch
 import torchvision.transforms.functional as F
@@ -8,7 +10,7 @@ from PIL import Image
 
 # Custom imports
 from src.pipeline import BillRoiPredictor
-from config import MODEL_PATH, CONFIDENCE_THRESHOLD
+from config import MODEL_PATH, CONFIDENCE_THRESHOLD, MAX_BATCH_SIZE
 
 # Initialize FastAPI app and predictor
 app = FastAPI()
@@ -22,6 +24,10 @@ class PredictionResponse(BaseModel):
     labels: list
 
 
+class BatchPredictionResponse(BaseModel):
+    results: List[PredictionResponse]
+
+
 @app.post("/predict", response_model=PredictionResponse)
 async def predict(image: UploadFile = File(...)):
     """
@@ -47,6 +53,52 @@ async def predict(image: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
 
 
+def decode_and_predict(images_bytes):
+    """
+    Decode uploaded images and run them through the model in one forward pass.
+    """
+    pil_images = [
+        Image.open(io.BytesIO(image_bytes)).convert("RGB")
+        for image_bytes in images_bytes
+    ]
+    with torch.no_grad():
+        return predictor.predict_images(pil_images)
+
+
+@app.post("/predict_batch", response_model=BatchPredictionResponse)
+async def predict_batch(images: List[UploadFile] = File(...)):
+    """
+    Predict bounding boxes for several uploaded images in one forward pass.
+    """
+    if len(images) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_SIZE} images per request",
+        )
+
+    try:
+        # Read image bytes
+        images_bytes = [await image.read() for image in images]
+
+        # Decode and predict in the threadpool so the event loop stays free
+        predictions = await run_in_threadpool(decode_and_predict, images_bytes)
+
+        # Return the results in upload order
+        return {
+            "results": [
+                {
+                    "boxes": boxes.tolist(),
+                    "scores": scores.tolist(),
+                    "labels": labels.tolist(),
+                }
+                for boxes, scores, labels in predictions
+            ]
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {e}")
+
+
 if __name__ == '__main__':
     import uvicorn
     uvicorn.run("app:app", host="0.0.0.0", port=8888)
@@ -12,4 +12,5 @@ device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
 MODEL_PATH = os.path.join(ROOT, "models", "model.pth")
 print(MODEL_PATH)
-CONFIDENCE_THRESHOLD = 0.8
\ No newline at end of file
+CONFIDENCE_THRESHOLD = 0.8
+MAX_BATCH_SIZE = 8
\ No newline at end of file
@@ -7,10 +7,42 @@ with the Receipt Detection API.
 
 import requests
 import json
+import mimetypes
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from typing import List, Dict, Optional, Tuple
+import numpy as np
 from PIL import Image
+from requests_toolbelt.multipart.encoder import MultipartEncoder
 import io
 
+# Make the repository root importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.http_client import SESSION, post_with_retry
+
+# libjpeg-turbo is optional, it enables lossless JPEG cropping. TurboJPEG()
+# raises RuntimeError when the wrapper is installed but the native library is not.
+try:
+    from turbojpeg import TurboJPEG
+    _turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    _turbo_jpeg = None
+
+# Threads used to encode and save cropped receipts
+SAVE_WORKERS = 4
+
+# Pillow save options for in-memory uploads
+ENCODE_OPTIONS = {
+    "JPEG": {"quality": 90, "optimize": False, "subsampling": 2},
+    "PNG": {},
+}
+
+def _save_crop(region: np.ndarray, output_path: str) -> None:
+    """Encode a cropped image region and write it to disk."""
+    Image.fromarray(region).save(output_path)
+
 class ReceiptDetectionClient:
     """
     Client for the Receipt Detection API.
@@ -19,15 +51,46 @@ class ReceiptDetectionClient:
     API and process the results.
     """
     
-    def __init__(self, api_url: str = "http://127.0.0.1:8888/predict"):
+    def __init__(self, api_url: str = "http://127.0.0.1:8888/predict",
+                 batch_api_url: Optional[str] = None,
+                 session: Optional[requests.Session] = None):
         """
         Initialize the API client.
         
         Args:
             api_url (str): The API endpoint URL
+            batch_api_url (str, optional): The batch endpoint URL, defaults
+                to /predict_batch next to api_url
+            session (requests.Session, optional): Session to send requests
+                with, defaults to the shared pooled session
         """
         self.api_url = api_url
-        self.session = requests.Session()
+        self.batch_api_url = batch_api_url or api_url.rsplit("/", 1)[0] + "/predict_batch"
+        self.session = session or SESSION
+    
+    def _post_image(self, filename: str, fileobj, content_type: str) -> requests.Response:
+        """
+        Upload an image as a streamed multipart body.
+        
+        Real files are read in chunks while the request is sent, so the
+        whole image is never buffered in memory. In-memory buffers such
+        as BytesIO are copied once by the encoder. Gateway errors are
+        retried with backoff, rewinding the file object for each attempt.
+        
+        Args:
+            filename (str): File name reported to the API
+            fileobj: Readable binary file object
+            content_type (str): MIME type of the image
+            
+        Returns:
+            requests.Response from the API
+        """
+        def make_body():
+            fileobj.seek(0)
+            encoder = MultipartEncoder(fields={"image": (filename, fileobj, content_type)})
+            return encoder, {"Content-Type": encoder.content_type}
+        
+        return post_with_retry(self.session, self.api_url, make_body)
     
     def detect_receipts(self, image_path: str) -> Optional[Dict]:
         """
@@ -40,9 +103,9 @@ class ReceiptDetectionClient:
             Dict containing boxes, scores, and labels, or None if failed
         """
         try:
+            content_type = mimetypes.guess_type(image_path)[0] or "application/octet-stream"
             with open(image_path, "rb") as f:
-                files = {"image": f}
-                response = self.session.post(self.api_url, files=files)
+                response = self._post_image(os.path.basename(image_path), f, content_type)
             
             if response.status_code == 200:
                 return response.json()
@@ -54,24 +117,86 @@ class ReceiptDetectionClient:
             print(f"Error processing image: {e}")
             return None
     
-    def detect_receipts_from_pil(self, image: Image.Image) -> Optional[Dict]:
+    def detect_receipts_batch(self, image_paths: List[str],
+                              chunk_size: int = 8) -> List[Optional[Dict]]:
+        """
+        Detect receipts in several image files using the batch endpoint.
+        
+        Images are sent in chunks of ``chunk_size`` per request, which
+        saves one round-trip per image and lets the server run each
+        chunk through the model together.
+        
+        Args:
+            image_paths (List[str]): Paths to the image files
+            chunk_size (int): Number of images per request
+            
+        Returns:
+            List with one detection result per image, in input order.
+            Entries are None for images in a failed request.
+        """
+        results = []
+        
+        for start in range(0, len(image_paths), chunk_size):
+            chunk = image_paths[start:start + chunk_size]
+            try:
+                with ExitStack() as stack:
+                    files = [stack.enter_context(open(path, "rb")) for path in chunk]
+                    
+                    def make_body():
+                        fields = []
+                        for path, f in zip(chunk, files):
+                            f.seek(0)
+                            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                            fields.append(("images", (os.path.basename(path), f, content_type)))
+                        encoder = MultipartEncoder(fields=fields)
+                        return encoder, {"Content-Type": encoder.content_type}
+                    
+                    response = post_with_retry(self.session, self.batch_api_url, make_body)
+                
+                if response.status_code == 200:
+                    results.extend(response.json()["results"])
+                    continue
+                print(f"API Error: {response.status_code} - {response.text}")
+                
+            except Exception as e:
+                print(f"Error processing images: {e}")
+            
+            results.extend([None] * len(chunk))
+        
+        return results
+    
+    def detect_receipts_from_pil(self, image: Image.Image, fmt: str = "JPEG") -> Optional[Dict]:
         """
         Detect receipts from a PIL Image object.
         
+        The image is encoded as JPEG by default, which is much faster
+        than PNG for photographs. If the image is already on disk, use
+        detect_receipts instead to upload the file without re-encoding.
+        
         Args:
             image (PIL.Image): PIL Image object
+            fmt (str): Upload format, "JPEG" or "PNG"
             
         Returns:
             Dict containing boxes, scores, and labels, or None if failed
         """
         try:
+            fmt = fmt.upper()
+            if fmt not in ENCODE_OPTIONS:
+                raise ValueError(f"Unsupported upload format: {fmt}")
+            
+            # JPEG has no alpha channel or palette
+            if fmt == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            
             # Convert PIL image to bytes
             img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='PNG')
-            img_byte_arr = img_byte_arr.getvalue()
+            image.save(img_byte_arr, format=fmt, **ENCODE_OPTIONS[fmt])
+            img_byte_arr.seek(0)
             
-            files = {"image": ("image.png", img_byte_arr, "image/png")}
-            response = self.session.post(self.api_url, files=files)
+            extension = "jpg" if fmt == "JPEG" else fmt.lower()
+            response = self._post_image(f"image.{extension}", img_byte_arr,
+                                        f"image/{fmt.lower()}")
             
             if response.status_code == 200:
                 return response.json()
@@ -88,6 +213,11 @@ class ReceiptDetectionClient:
         """
         Crop detected receipts from the original image.
         
+        JPEG images are cropped losslessly with libjpeg-turbo when
+        PyTurboJPEG is installed. libjpeg-turbo snaps the crop origin to
+        the JPEG block grid, so crops may include a few extra pixels on the
+        top and left edges. Other formats are cropped with Pillow.
+        
         Args:
             image_path (str): Path to the original image
             detection_result (Dict): Detection results from API
@@ -99,33 +229,81 @@ class ReceiptDetectionClient:
         if not detection_result:
             return []
         
-        import os
         os.makedirs(output_dir, exist_ok=True)
         
-        # Load the original image
-        image = Image.open(image_path).convert("RGB")
-        
-        boxes = detection_result.get("boxes", [])
         scores = detection_result.get("scores", [])
+        boxes = np.asarray(detection_result.get("boxes", []), dtype=np.int32).reshape(-1, 4)
         
-        cropped_paths = []
+        cropped_paths = [
+            os.path.join(output_dir, f"receipt_{i+1}_score_{score:.2f}.jpg")
+            for i, (_, score) in enumerate(zip(boxes, scores))
+        ]
+        boxes = boxes[:len(cropped_paths)]
         
-        # Crop each detected receipt
-        for i, (box, score) in enumerate(zip(boxes, scores)):
-            x1, y1, x2, y2 = map(int, box)
-            
-            # Crop the bounding box
-            cropped_image = image.crop((x1, y1, x2, y2))
-            
-            # Save the cropped image
-            output_filename = f"receipt_{i+1}_score_{score:.2f}.jpg"
-            output_path = os.path.join(output_dir, output_filename)
-            cropped_image.save(output_path)
-            
-            cropped_paths.append(output_path)
+        # JPEG sources can be cropped without decoding the pixels
+        if _turbo_jpeg is not None and image_path.lower().endswith((".jpg", ".jpeg")):
+            try:
+                self._crop_jpeg_lossless(image_path, boxes, cropped_paths)
+                return cropped_paths
+            except (OSError, ValueError) as e:
+                print(f"Lossless JPEG crop failed, falling back to Pillow: {e}")
         
+        self._crop_with_pillow(image_path, boxes, cropped_paths)
         return cropped_paths
     
+    def _crop_jpeg_lossless(self, image_path: str, boxes: np.ndarray,
+                            output_paths: List[str]) -> None:
+        """
+        Crop a JPEG file on its DCT blocks with libjpeg-turbo.
+        
+        Args:
+            image_path (str): Path to the original JPEG image
+            boxes (np.ndarray): Integer boxes in format [x1, y1, x2, y2]
+            output_paths (List[str]): Output path for each box
+        """
+        with open(image_path, "rb") as f:
+            jpeg_bytes = f.read()
+        
+        width, height, _, _ = _turbo_jpeg.decode_header(jpeg_bytes)
+        
+        # Clip boxes to the image, TurboJPEG.crop aligns the origin to the MCU grid
+        boxes = boxes.copy()
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+        
+        for (x1, y1, x2, y2), output_path in zip(boxes.tolist(), output_paths):
+            cropped = _turbo_jpeg.crop(jpeg_bytes, x1, y1, x2 - x1, y2 - y1)
+            with open(output_path, "wb") as f:
+                f.write(cropped)
+    
+    def _crop_with_pillow(self, image_path: str, boxes: np.ndarray,
+                          output_paths: List[str]) -> None:
+        """
+        Crop an image by decoding it with Pillow and re-encoding each crop.
+        
+        Args:
+            image_path (str): Path to the original image
+            boxes (np.ndarray): Integer boxes in format [x1, y1, x2, y2]
+            output_paths (List[str]): Output path for each box
+        """
+        # Load the original image once as an array, crops are views into it
+        image = np.asarray(Image.open(image_path).convert("RGB"))
+        height, width = image.shape[:2]
+        
+        # Clip boxes to the image so slicing never wraps around
+        boxes = boxes.copy()
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+        
+        # Crop each detected receipt, encoding and saving in parallel
+        with ThreadPoolExecutor(max_workers=SAVE_WORKERS) as executor:
+            futures = [
+                executor.submit(_save_crop, image[y1:y2, x1:x2], output_path)
+                for (x1, y1, x2, y2), output_path in zip(boxes.tolist(), output_paths)
+            ]
+            for future in futures:
+                future.result()
+    
     def get_detection_summary(self, detection_result: Dict) -> Dict:
         """
         Get a summary of detection results.
@@ -145,11 +323,13 @@ class ReceiptDetectionClient:
         if not scores:
             return {"count": 0, "avg_confidence": 0, "max_confidence": 0, "min_confidence": 0}
         
+        scores = np.asarray(scores, dtype=np.float64)
+        
         return {
             "count": len(boxes),
-            "avg_confidence": sum(scores) / len(scores),
-            "max_confidence": max(scores),
-            "min_confidence": min(scores)
+            "avg_confidence": float(scores.mean()),
+            "max_confidence": float(scores.max()),
+            "min_confidence": float(scores.min())
         }
 
 # Example usage
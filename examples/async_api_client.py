@@ -0,0 +1,79 @@
+"""
+Asynchronous API client for Receipt Detection.
+
+This module provides an asyncio client for running many
+detections against the Receipt Detection API concurrently.
+It is kept separate from api_client so the synchronous client
+does not depend on httpx and aiofiles.
+"""
+
+import mimetypes
+import os
+from typing import Dict, Optional
+
+import aiofiles
+import httpx
+
+class AsyncReceiptDetectionClient:
+    """
+    Asynchronous client for the Receipt Detection API.
+    
+    Concurrent detections share a pool of keep-alive connections. HTTP/2
+    is enabled, but httpx only negotiates it over TLS (ALPN), so against
+    a plain http:// URL such as the default uvicorn server requests use
+    the HTTP/1.1 connection pool instead of multiplexing.
+    """
+    
+    def __init__(self, api_url: str = "http://127.0.0.1:8888/predict",
+                 max_connections: int = 32):
+        """
+        Initialize the async API client.
+        
+        Args:
+            api_url (str): The API endpoint URL
+            max_connections (int): Maximum number of pooled connections
+        """
+        self.api_url = api_url
+        self._client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+    
+    async def detect_receipts(self, image_path: str) -> Optional[Dict]:
+        """
+        Detect receipts in an image file.
+        
+        Args:
+            image_path (str): Path to the image file
+            
+        Returns:
+            Dict containing boxes, scores, and labels, or None if failed
+        """
+        try:
+            async with aiofiles.open(image_path, "rb") as f:
+                data = await f.read()
+            
+            content_type = mimetypes.guess_type(image_path)[0] or "application/octet-stream"
+            files = {"image": (os.path.basename(image_path), data, content_type)}
+            response = await self._client.post(self.api_url, files=files)
+            
+            if response.status_code == 200:
+                return response.json()
+            else:
+                print(f"API Error: {response.status_code} - {response.text}")
+                return None
+                
+        except Exception as e:
+            print(f"Error processing image: {e}")
+            return None
+    
+    async def close(self) -> None:
+        """Close the underlying HTTP connections."""
+        await self._client.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -5,22 +5,30 @@ This script demonstrates how to use the receipt detection API
 to detect and crop receipts from images.
 """
 
-import requests
 import json
 from PIL import Image
 import os
+import sys
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+# Make the repository root importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.http_client import SESSION
 
 # Configuration
 API_URL = "http://127.0.0.1:8888/predict"
 IMAGE_PATH = "data/raw/unnamed (1).webp"  # Example image path
+SAVE_WORKERS = 4  # Threads used to encode and save cropped receipts
 
-def detect_receipts(image_path, api_url=API_URL):
+def detect_receipts(image_path, api_url=API_URL, session=SESSION):
     """
     Detect receipts in an image using the API.
     
     Args:
         image_path (str): Path to the input image
         api_url (str): API endpoint URL
+        session (requests.Session): Session used for the request
         
     Returns:
         dict: API response containing boxes, scores, and labels
@@ -28,7 +36,7 @@ def detect_receipts(image_path, api_url=API_URL):
     try:
         with open(image_path, "rb") as f:
             files = {"image": f}
-            response = requests.post(api_url, files=files)
+            response = session.post(api_url, files=files)
         
         if response.status_code == 200:
             return response.json()
@@ -55,26 +63,32 @@ def crop_receipts(image_path, detection_result, output_dir="data/processed"):
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
-    # Load the original image
-    image = Image.open(image_path).convert("RGB")
+    # Load the original image once as an array, crops are views into it
+    image = np.asarray(Image.open(image_path).convert("RGB"))
+    height, width = image.shape[:2]
     
-    boxes = detection_result.get("boxes", [])
     scores = detection_result.get("scores", [])
+    boxes = np.asarray(detection_result.get("boxes", []), dtype=np.int32).reshape(-1, 4)
+    
+    # Clip boxes to the image so slicing never wraps around
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
     
     print(f"Found {len(boxes)} receipt(s) in the image")
     
-    # Crop each detected receipt
-    for i, (box, score) in enumerate(zip(boxes, scores)):
-        x1, y1, x2, y2 = map(int, box)
-        
-        # Crop the bounding box
-        cropped_image = image.crop((x1, y1, x2, y2))
-        
-        # Save the cropped image
-        output_filename = f"receipt_{i+1}_score_{score:.2f}.jpg"
-        output_path = os.path.join(output_dir, output_filename)
-        cropped_image.save(output_path)
-        
+    # Build every crop and its output path up front
+    detections = list(zip(boxes.tolist(), scores))
+    crops = [
+        (Image.fromarray(image[y1:y2, x1:x2]),
+         os.path.join(output_dir, f"receipt_{i+1}_score_{score:.2f}.jpg"))
+        for i, ((x1, y1, x2, y2), score) in enumerate(detections)
+    ]
+    
+    # Save the cropped images in parallel, Pillow releases the GIL while encoding
+    with ThreadPoolExecutor(max_workers=SAVE_WORKERS) as executor:
+        list(executor.map(lambda crop: crop[0].save(crop[1]), crops))
+    
+    for ((x1, y1, x2, y2), score), (_, output_path) in zip(detections, crops):
         print(f"Saved cropped receipt: {output_path}")
         print(f"  Confidence score: {score:.2f}")
         print(f"  Bounding box: ({x1}, {y1}, {x2}, {y2})")
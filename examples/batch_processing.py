@@ -5,91 +5,280 @@ This script demonstrates how to process multiple images
 and save annotated results.
 """
 
-import requests
+import asyncio
+import logging
 import os
-from PIL import Image, ImageDraw
-import time
+
+import aiofiles
+import aiohttp
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from tqdm.asyncio import tqdm
+from tqdm.contrib.logging import logging_redirect_tqdm
+
+# libvips is optional, it streams decode/encode instead of loading full images
+try:
+    import pyvips
+    USE_VIPS = True
+except (ImportError, OSError):
+    USE_VIPS = False
 
 # Configuration
-API_URL = "http://127.0.0.1:8888/predict"
+API_URL = "http://127.0.0.1:8888/predict_batch"
 INPUT_DIR = "data/raw"
 OUTPUT_DIR = "data/processed/batch_results"
 
+# Images sent per request, at most MAX_BATCH_SIZE in config.py
+BATCH_SIZE = 8
+
+# Maximum number of batch requests in flight at once
+MAX_CONCURRENT_REQUESTS = 2
+
+# Longest side of saved annotated images, None keeps full resolution
+MAX_SIDE = 2048
+
 # Supported image extensions
-SUPPORTED_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp")
+SUPPORTED_EXTENSIONS = frozenset((".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp"))
+
+# Font for score labels, loaded once
+FONT = ImageFont.load_default()
+
+# Per-image progress messages
+log = logging.getLogger("batch")
+log.setLevel(logging.INFO)
+if not log.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+
+def to_pixel_boxes(boxes, scale=1.0):
+    """Scale boxes and cast them to integer pixel coordinates in one NumPy pass."""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    if scale != 1.0:
+        boxes = boxes * scale
+    return boxes.astype(np.int32).tolist()
+
+def annotate_and_save(image_path, boxes, scores, output_path, max_side=MAX_SIDE):
+    """
+    Draw detected bounding boxes on an image and save it.
+
+    Args:
+        image_path (str): Path to the original image
+        boxes (list): Bounding boxes in format [x1, y1, x2, y2]
+        scores (list): Confidence score for each box
+        output_path (str): Path to save the annotated image
+        max_side (int, optional): Downscale images whose longest side is
+            larger than this before drawing. None keeps full resolution.
+    """
+    labels = [f"{score:.2f}" for score in scores]
+
+    if USE_VIPS:
+        try:
+            _annotate_with_vips(image_path, boxes, labels, output_path, max_side)
+            return
+        except pyvips.Error as e:
+            # e.g. libvips built without text rendering support
+            log.info(f"libvips annotation failed, falling back to Pillow: {e}")
+
+    image = Image.open(image_path).convert("RGB")
+
+    # Shrink large images first, drawing and encoding scale with pixel count
+    scale = 1.0 if max_side is None else min(1.0, max_side / max(image.size))
+    if scale < 1.0:
+        width, height = image.size
+        image = image.resize((int(width * scale), int(height * scale)),
+                             Image.Resampling.BILINEAR)
+
+    draw = ImageDraw.Draw(image)
+
+    # Draw bounding boxes
+    for (x1, y1, x2, y2), label in zip(to_pixel_boxes(boxes, scale), labels):
+        draw.rectangle([x1, y1, x2, y2], outline="red", width=3)
+        draw.text((x1, max(0, y1 - 15)), label, fill="red", font=FONT)
+
+    image.save(output_path)
+
+def _annotate_with_vips(image_path, boxes, labels, output_path, max_side):
+    """
+    Same as annotate_and_save, using libvips for decode, draw and encode.
+
+    libvips draw operations copy the whole image into memory, so outlines
+    and labels are instead rendered into a single-band NumPy mask and
+    applied in one lazy ifthenelse. The image itself is then streamed
+    from file to file.
+    """
+    image = pyvips.Image.new_from_file(image_path, access="sequential")
+    if image.hasalpha():
+        image = image.flatten()
+    image = image.colourspace("srgb")
+
+    scale = 1.0 if max_side is None else min(1.0, max_side / max(image.width, image.height))
+    if scale < 1.0:
+        image = image.resize(scale, kernel="linear")
+
+    height, width = image.height, image.width
+    mask = np.zeros((height, width), dtype=np.uint8)
+    text_masks = {}
+
+    for (x1, y1, x2, y2), label in zip(to_pixel_boxes(boxes, scale), labels):
+        # Clip to the image, x2/y2 are inclusive as in ImageDraw.rectangle
+        x1, x2 = max(0, min(x1, width)), max(0, min(x2 + 1, width))
+        y1, y2 = max(0, min(y1, height)), max(0, min(y2 + 1, height))
+
+        # 3px outline drawn inwards, one strip per edge so overlapping boxes stay intact
+        mask[y1:min(y1 + 3, y2), x1:x2] = 255
+        mask[max(y1, y2 - 3):y2, x1:x2] = 255
+        mask[y1:y2, x1:min(x1 + 3, x2)] = 255
+        mask[y1:y2, max(x1, x2 - 3):x2] = 255
+
+        # Anti-aliased label above the box, rendered once per distinct label
+        if label not in text_masks:
+            text_image = pyvips.Image.text(label, dpi=72)
+            text_masks[label] = text_image.numpy().reshape(text_image.height, text_image.width)
+        text = text_masks[label]
+        top = max(0, y1 - 15)
+        region = mask[top:top + text.shape[0], x1:x1 + text.shape[1]]
+        np.maximum(region, text[:region.shape[0], :region.shape[1]], out=region)
+
+    overlay = pyvips.Image.new_from_memory(mask.data, width, height, 1, "uchar")
+    image = overlay.ifthenelse([255, 0, 0], image, blend=True)
+    image.write_to_file(output_path)
+
+async def annotate_result(image_path, result, output_dir, max_side):
+    """
+    Save the annotated image for one detection result.
+
+    Args:
+        image_path (str): Path to the input image
+        result (dict): Detection result for the image
+        output_dir (str): Directory to save annotated results
+        max_side (int, optional): Longest side of the saved image
 
-def process_batch(input_dir=INPUT_DIR, output_dir=OUTPUT_DIR, api_url=API_URL):
+    Returns:
+        bool: True if the annotated image was saved
+    """
+    filename = os.path.basename(image_path)
+    boxes = result.get("boxes", [])
+    scores = result.get("scores", [])
+
+    try:
+        # Annotate and save off the event loop, PIL work is CPU-bound
+        output_path = os.path.join(output_dir, f"annotated_{filename}")
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None, annotate_and_save, image_path, boxes, scores, output_path, max_side
+        )
+    except Exception as e:
+        log.info(f"❌ {filename}: Error: {str(e)}")
+        return False
+
+    log.info(f"✅ {filename}: {len(boxes)} receipt(s) detected, saved {output_path}")
+    return True
+
+async def process_chunk(session, semaphore, image_paths, output_dir, api_url,
+                        max_side=MAX_SIDE):
+    """
+    Send a chunk of images to the batch endpoint and save the annotated results.
+
+    Args:
+        session (aiohttp.ClientSession): Session used for the request
+        semaphore (asyncio.Semaphore): Bounds the number of concurrent requests
+        image_paths (list): Paths to the input images in this chunk
+        output_dir (str): Directory to save annotated results
+        api_url (str): Batch API endpoint URL
+        max_side (int, optional): Longest side of the saved image
+
+    Returns:
+        list: One bool per image, True if it was processed successfully
+    """
+    filenames = [os.path.basename(path) for path in image_paths]
+
+    async with semaphore:
+        try:
+            # Send all images of the chunk in one request
+            form = aiohttp.FormData()
+            for image_path, filename in zip(image_paths, filenames):
+                async with aiofiles.open(image_path, "rb") as f:
+                    form.add_field("images", await f.read(), filename=filename)
+
+            async with session.post(api_url, data=form) as response:
+                if response.status != 200:
+                    error = f"HTTP {response.status}, {await response.text()}"
+                    for filename in filenames:
+                        log.info(f"❌ {filename}: {error}")
+                    return [False] * len(image_paths)
+                results = (await response.json())["results"]
+
+        except Exception as e:
+            for filename in filenames:
+                log.info(f"❌ {filename}: Error: {str(e)}")
+            return [False] * len(image_paths)
+
+    # The batch response holds one result per image, in upload order
+    return await asyncio.gather(*(
+        annotate_result(image_path, result, output_dir, max_side)
+        for image_path, result in zip(image_paths, results)
+    ))
+
+async def process_batch(input_dir=INPUT_DIR, output_dir=OUTPUT_DIR, api_url=API_URL,
+                        max_concurrent=MAX_CONCURRENT_REQUESTS, session=None,
+                        max_side=MAX_SIDE, batch_size=BATCH_SIZE):
     """
     Process all images in a directory and save annotated results.
-    
+
+    Images are uploaded to the batch endpoint in chunks of ``batch_size``,
+    with at most ``max_concurrent`` requests in flight at any time.
+
     Args:
         input_dir (str): Directory containing input images
         output_dir (str): Directory to save annotated results
-        api_url (str): API endpoint URL
+        api_url (str): Batch API endpoint URL
+        max_concurrent (int): Maximum number of concurrent requests
+        session (aiohttp.ClientSession, optional): Existing session to reuse.
+            A new session is created and closed if not provided.
+        max_side (int, optional): Downscale annotated images so their
+            longest side is at most this many pixels. None keeps full
+            resolution.
+        batch_size (int): Number of images per request
     """
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
-    
+
     # Get all image files
-    image_files = [f for f in os.listdir(input_dir) 
-                   if f.lower().endswith(SUPPORTED_EXTENSIONS)]
-    
+    with os.scandir(input_dir) as entries:
+        image_files = [entry.path for entry in entries
+                       if entry.is_file()
+                       and os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS]
+
     if not image_files:
         print(f"No supported image files found in {input_dir}")
         return
-    
+
     print(f"Found {len(image_files)} image(s) to process")
     print("=" * 50)
-    
-    successful = 0
-    failed = 0
-    
-    for i, filename in enumerate(image_files, 1):
-        image_path = os.path.join(input_dir, filename)
-        print(f"[{i}/{len(image_files)}] Processing: {filename}")
-        
-        try:
-            # Send request to API
-            with open(image_path, "rb") as f:
-                files = {"image": f}
-                response = requests.post(api_url, files=files)
-            
-            if response.status_code == 200:
-                result = response.json()
-                boxes = result.get("boxes", [])
-                scores = result.get("scores", [])
-                
-                # Load and annotate image
-                image = Image.open(image_path).convert("RGB")
-                draw = ImageDraw.Draw(image)
-                
-                # Draw bounding boxes
-                for box, score in zip(boxes, scores):
-                    x1, y1, x2, y2 = map(int, box)
-                    draw.rectangle([x1, y1, x2, y2], outline="red", width=3)
-                    draw.text((x1, max(0, y1 - 15)), f"{score:.2f}", fill="red")
-                
-                # Save annotated image
-                output_path = os.path.join(output_dir, f"annotated_{filename}")
-                image.save(output_path)
-                
-                print(f"  ✅ Success: {len(boxes)} receipt(s) detected")
-                print(f"  📁 Saved: {output_path}")
-                successful += 1
-                
-            else:
-                print(f"  ❌ Failed: HTTP {response.status_code}")
-                print(f"  📝 Error: {response.text}")
-                failed += 1
-                
-        except Exception as e:
-            print(f"  ❌ Error: {str(e)}")
-            failed += 1
-        
-        # Small delay to avoid overwhelming the API
-        time.sleep(0.1)
-        print()
-    
+
+    semaphore = asyncio.Semaphore(max_concurrent)
+    chunks = [image_files[start:start + batch_size]
+              for start in range(0, len(image_files), batch_size)]
+
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession()
+
+    try:
+        with logging_redirect_tqdm(loggers=[log]):
+            chunk_results = await tqdm.gather(*(
+                process_chunk(session, semaphore, chunk, output_dir, api_url, max_side)
+                for chunk in chunks
+            ), desc="Processing", unit="batch")
+    finally:
+        if own_session:
+            await session.close()
+
+    results = [ok for chunk in chunk_results for ok in chunk]
+    successful = sum(results)
+    failed = len(results) - successful
+
     # Summary
     print("=" * 50)
     print(f"Batch processing complete!")
@@ -101,15 +290,15 @@ def main():
     """Main function to run batch processing."""
     print("Receipt Detection - Batch Processing")
     print("=" * 40)
-    
+
     # Check if input directory exists
     if not os.path.exists(INPUT_DIR):
         print(f"Input directory not found: {INPUT_DIR}")
         print("Please ensure you have images in the data/raw directory")
         return
-    
+
     # Start batch processing
-    process_batch()
+    asyncio.run(process_batch())
 
 if __name__ == "__main__":
     main()
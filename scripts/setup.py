@@ -4,56 +4,70 @@ Setup script for the Receipt Detection system.
 This script helps set up the environment and verify the installation.
 """
 
+import asyncio
 import os
 import sys
 import subprocess
-import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def check_dependencies():
-    """Check if all required dependencies are installed."""
-    print("Checking dependencies...")
+def try_import(package):
+    """Try to import a package, returning (package, success)."""
+    try:
+        __import__(package)
+        return package, True
+    except ImportError:
+        return package, False
+
+def check_dependencies(report):
+    """Check if all required dependencies are installed, appending output lines to report."""
+    report.append("Checking dependencies...")
     
     required_packages = [
         'fastapi', 'uvicorn', 'torch', 'torchvision', 
-        'PIL', 'numpy', 'requests', 'pydantic'
+        'PIL', 'numpy', 'requests', 'aiohttp', 'pydantic'
     ]
     
     missing_packages = []
     
-    for package in required_packages:
-        try:
-            __import__(package)
-            print(f"✅ {package}")
-        except ImportError:
-            print(f"❌ {package} - Missing")
+    # Imports are independent, so probe them concurrently
+    with ThreadPoolExecutor(max_workers=len(required_packages)) as executor:
+        results = list(executor.map(try_import, required_packages))
+    
+    for package, ok in results:
+        if ok:
+            report.append(f"✅ {package}")
+        else:
+            report.append(f"❌ {package} - Missing")
             missing_packages.append(package)
     
     if missing_packages:
-        print(f"\nMissing packages: {', '.join(missing_packages)}")
-        print("Install them with: pip install -r requirements.txt")
+        report.append(f"\nMissing packages: {', '.join(missing_packages)}")
+        report.append("Install them with: pip install -r requirements.txt")
+        if 'aiohttp' in missing_packages:
+            report.append("aiohttp is installed with: pip install -r requirements-dev.txt")
         return False
     
-    print("✅ All dependencies installed")
+    report.append("✅ All dependencies installed")
     return True
 
-def check_model_file():
-    """Check if the model file exists."""
-    print("\nChecking model file...")
+def check_model_file(report):
+    """Check if the model file exists, appending output lines to report."""
+    report.append("\nChecking model file...")
     
     model_path = Path("models/model.pth")
     if model_path.exists():
-        print(f"✅ Model file found: {model_path}")
+        report.append(f"✅ Model file found: {model_path}")
         return True
     else:
-        print(f"❌ Model file not found: {model_path}")
-        print("Please ensure the trained model is in the models/ directory")
+        report.append(f"❌ Model file not found: {model_path}")
+        report.append("Please ensure the trained model is in the models/ directory")
         return False
 
-def check_directories():
-    """Check if required directories exist."""
-    print("\nChecking directory structure...")
+def check_directories(report):
+    """Check if required directories exist, appending output lines to report."""
+    report.append("\nChecking directory structure...")
     
     required_dirs = [
         "data/raw", "data/processed", "models", "examples", 
@@ -64,101 +78,131 @@ def check_directories():
     
     for dir_path in required_dirs:
         if Path(dir_path).exists():
-            print(f"✅ {dir_path}")
+            report.append(f"✅ {dir_path}")
         else:
-            print(f"❌ {dir_path} - Missing")
+            report.append(f"❌ {dir_path} - Missing")
             missing_dirs.append(dir_path)
     
     if missing_dirs:
-        print(f"\nMissing directories: {', '.join(missing_dirs)}")
-        print("Creating missing directories...")
+        report.append(f"\nMissing directories: {', '.join(missing_dirs)}")
+        report.append("Creating missing directories...")
         for dir_path in missing_dirs:
             Path(dir_path).mkdir(parents=True, exist_ok=True)
-            print(f"✅ Created: {dir_path}")
+            report.append(f"✅ Created: {dir_path}")
     
     return True
 
-def test_api():
-    """Test if the API is running."""
-    print("\nTesting API...")
+async def test_api(session, report):
+    """Test if the API is running, appending output lines to report."""
+    import aiohttp
+    
+    report.append("\nTesting API...")
     
     try:
-        response = requests.get("http://127.0.0.1:8888/docs", timeout=5)
-        if response.status_code == 200:
-            print("✅ API is running")
-            return True
-        else:
-            print("❌ API returned status code:", response.status_code)
-            return False
-    except requests.exceptions.ConnectionError:
-        print("❌ API is not running")
-        print("Start the API with: python app.py")
+        async with session.get("http://127.0.0.1:8888/docs",
+                               timeout=aiohttp.ClientTimeout(total=5)) as response:
+            if response.status == 200:
+                report.append("✅ API is running")
+                return True
+            else:
+                report.append(f"❌ API returned status code: {response.status}")
+                return False
+    except aiohttp.ClientConnectionError:
+        report.append("❌ API is not running")
+        report.append("Start the API with: python app.py")
         return False
     except Exception as e:
-        print(f"❌ Error testing API: {e}")
+        report.append(f"❌ Error testing API: {e}")
         return False
 
-def run_basic_test():
-    """Run a basic test with a sample image."""
-    print("\nRunning basic test...")
-    
-    # Check if test images exist
+def find_test_image():
+    """Return the first file in data/raw, or None if there is none."""
     test_images_dir = Path("data/raw")
-    if not test_images_dir.exists() or not list(test_images_dir.glob("*")):
-        print("❌ No test images found in data/raw/")
-        print("Please add some test images to data/raw/")
-        return False
+    if not test_images_dir.exists():
+        return None
+    return next((path for path in test_images_dir.glob("*") if path.is_file()), None)
+
+async def run_basic_test(session, report):
+    """Run a basic test with a sample image, appending output lines to report."""
+    import aiohttp
+    
+    report.append("\nRunning basic test...")
     
     # Find first test image
-    test_image = next(test_images_dir.glob("*"), None)
+    test_image = await asyncio.to_thread(find_test_image)
     if not test_image:
-        print("❌ No test images found")
+        report.append("❌ No test images found in data/raw/")
+        report.append("Please add some test images to data/raw/")
         return False
     
-    print(f"Testing with image: {test_image}")
+    report.append(f"Testing with image: {test_image}")
     
     try:
-        with open(test_image, "rb") as f:
-            files = {"image": f}
-            response = requests.post("http://127.0.0.1:8888/predict", files=files)
+        form = aiohttp.FormData()
+        image_bytes = await asyncio.to_thread(test_image.read_bytes)
+        form.add_field("image", image_bytes, filename=test_image.name)
         
-        if response.status_code == 200:
-            result = response.json()
-            print(f"✅ Test successful!")
-            print(f"   Found {len(result['boxes'])} receipts")
-            if result['boxes']:
-                print(f"   Confidence scores: {[f'{s:.2f}' for s in result['scores']]}")
-            return True
-        else:
-            print(f"❌ Test failed: {response.status_code}")
-            print(f"   Error: {response.text}")
-            return False
+        async with session.post("http://127.0.0.1:8888/predict", data=form) as response:
+            if response.status == 200:
+                result = await response.json()
+                report.append(f"✅ Test successful!")
+                report.append(f"   Found {len(result['boxes'])} receipts")
+                if result['boxes']:
+                    report.append(f"   Confidence scores: {[f'{s:.2f}' for s in result['scores']]}")
+                return True
+            else:
+                report.append(f"❌ Test failed: {response.status}")
+                report.append(f"   Error: {await response.text()}")
+                return False
             
     except Exception as e:
-        print(f"❌ Test error: {e}")
+        report.append(f"❌ Test error: {e}")
         return False
 
-def main():
-    """Main setup function."""
-    print("Receipt Detection System Setup")
-    print("=" * 40)
+async def check_api(report):
+    """Test the API, then run the basic test if it is up."""
+    # aiohttp is a dev dependency, a missing one is reported by check_dependencies
+    try:
+        import aiohttp
+    except ImportError:
+        report.append("\nTesting API...")
+        report.append("❌ Skipped, aiohttp is not installed")
+        return False, False
+    
+    async with aiohttp.ClientSession() as session:
+        api_ok = await test_api(session, report)
+        
+        # Run basic test if API is running
+        test_ok = False
+        if api_ok:
+            test_ok = await run_basic_test(session, report)
+    
+    return api_ok, test_ok
+
+async def run_checks():
+    """Run the checks concurrently, then print their reports in order."""
+    deps_report, dirs_report, model_report, api_report = [], [], [], []
     
-    # Check dependencies
-    deps_ok = check_dependencies()
+    # Create missing directories before the checks that read them
+    dirs_ok = await asyncio.to_thread(check_directories, dirs_report)
     
-    # Check directories
-    dirs_ok = check_directories()
+    deps_ok, model_ok, (api_ok, test_ok) = await asyncio.gather(
+        asyncio.to_thread(check_dependencies, deps_report),
+        asyncio.to_thread(check_model_file, model_report),
+        check_api(api_report),
+    )
     
-    # Check model file
-    model_ok = check_model_file()
+    for report in (deps_report, dirs_report, model_report, api_report):
+        print("\n".join(report))
     
-    # Check API
-    api_ok = test_api()
+    return deps_ok, dirs_ok, model_ok, api_ok, test_ok
+
+def main():
+    """Main setup function."""
+    print("Receipt Detection System Setup")
+    print("=" * 40)
     
-    # Run basic test if API is running
-    test_ok = False
-    if api_ok:
-        test_ok = run_basic_test()
+    deps_ok, dirs_ok, model_ok, api_ok, test_ok = asyncio.run(run_checks())
     
     print("\n" + "=" * 40)
     print("Setup Summary:")
@@ -1,11 +1,16 @@
-import requests
+import os
+import sys
+
+# Make the repository root importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.http_client import SESSION
 
 url = "http://127.0.0.1:8888/predict"
 image_path = r"data\raw\unnamed (1).webp"
 
 with open(image_path, "rb") as f:
     files = {"image": f}
-    response = requests.post(url, files=files)
+    response = SESSION.post(url, files=files)
 
 print(response.status_code)
 print(response.json())
@@ -1,8 +1,15 @@
-import requests
+import logging
 import os
-from PIL import Image, ImageDraw
+import sys
+from PIL import Image, ImageDraw, ImageFont
+from tqdm import tqdm
+from tqdm.contrib.logging import logging_redirect_tqdm
 import matplotlib.pyplot as plt
 
+# Make the repository root importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.http_client import SESSION
+
 # API Endpoint
 url = "http://127.0.0.1:8888/predict"
 
@@ -14,18 +21,33 @@ output_folder = r"data\processed"
 os.makedirs(output_folder, exist_ok=True)
 
 # Supported image extensions
-valid_ext = (".jpg", ".jpeg", ".png", ".bmp", ".tiff")
+valid_ext = frozenset((".jpg", ".jpeg", ".png", ".bmp", ".tiff"))
+
+# Font for score labels, loaded once
+font = ImageFont.load_default()
+
+# Per-image progress messages
+log = logging.getLogger("test_bbox")
+log.setLevel(logging.INFO)
+handler = logging.StreamHandler()
+handler.setFormatter(logging.Formatter("%(message)s"))
+log.addHandler(handler)
+
+# Collect all images in input folder
+with os.scandir(input_folder) as entries:
+    image_entries = [entry for entry in entries
+                     if entry.is_file() and os.path.splitext(entry.name)[1].lower() in valid_ext]
 
 # Loop through all images in input folder
-for filename in os.listdir(input_folder):
-    if filename.lower().endswith(valid_ext):
-        image_path = os.path.join(input_folder, filename)
-        print(f"Processing: {filename}")
+with logging_redirect_tqdm(loggers=[log]):
+    for entry in tqdm(image_entries, desc="Processing", unit="image"):
+        filename = entry.name
+        image_path = entry.path
 
         # Send the POST Request
         with open(image_path, "rb") as f:
             files = {"image": f}
-            response = requests.post(url, files=files)
+            response = SESSION.post(url, files=files)
 
         if response.status_code == 200:
             response_data = response.json()
@@ -36,16 +58,18 @@ for filename in os.listdir(input_folder):
             image = Image.open(image_path).convert("RGB")
             draw = ImageDraw.Draw(image)
 
+            labels = [f"{score:.2f}" for score in scores]
+
             # Draw each bounding box
-            for box, score in zip(boxes, scores):
+            for box, label in zip(boxes, labels):
                 x1, y1, x2, y2 = box
                 draw.rectangle([x1, y1, x2, y2], outline="red", width=3)
-                draw.text((x1, y1 - 10), f"{score:.2f}", fill="red")
+                draw.text((x1, y1 - 10), label, fill="red", font=font)
 
             # Save the output image
             output_path = os.path.join(output_folder, filename)
             image.save(output_path)
-            print(f"Saved annotated image: {output_path}")
+            log.info(f"Saved annotated image: {output_path}")
 
         else:
-            print(f"❌ Failed: {filename} - {response.status_code}, {response.text}")
+            log.info(f"❌ Failed: {filename} - {response.status_code}, {response.text}")
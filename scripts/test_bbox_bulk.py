@@ -1,44 +1,152 @@
-import requests
-from PIL import Image, ImageDraw
+import asyncio
+import io
+import logging
 import os
+from concurrent.futures import ProcessPoolExecutor
+
+import aiofiles
+import aiohttp
+from PIL import Image, ImageDraw, ImageFont
+from tqdm import tqdm
+from tqdm.contrib.logging import logging_redirect_tqdm
 
 # API Endpoint and Input/Output Directories
-url = "http://127.0.0.1:8888/predict"
+url = "http://127.0.0.1:8888/predict_batch"
 image_dir = r"data\raw"
 output_dir = r"data\processed"
 
-# Create output directory if not exists
-os.makedirs(output_dir, exist_ok=True)
+# Supported image extensions
+valid_ext = frozenset((".png", ".jpg", ".jpeg", ".webp"))
+
+# Images per request (at most MAX_BATCH_SIZE in config.py), batch requests
+# in flight, and processes drawing annotations
+batch_size = 8
+max_concurrent_requests = 2
+annotate_workers = os.cpu_count() or 1
+
+# Font loaded once per worker process
+font = None
+
+# Per-image progress messages
+log = logging.getLogger("test_bbox_bulk")
+log.setLevel(logging.INFO)
+handler = logging.StreamHandler()
+handler.setFormatter(logging.Formatter("%(message)s"))
+log.addHandler(handler)
+
+
+def init_worker():
+    """Load the annotation font once in each worker process."""
+    global font
+    font = ImageFont.load_default()
+
+
+def annotate_bytes(image_bytes, boxes, scores):
+    """Decode an image, draw its boxes and return it re-encoded in its original format."""
+    image = Image.open(io.BytesIO(image_bytes))
+    image_format = image.format
+    image = image.convert("RGB")
+    draw = ImageDraw.Draw(image)
+
+    # Draw boxes
+    for box, score in zip(boxes, scores):
+        x1, y1, x2, y2 = box
+        draw.rectangle([x1, y1, x2, y2], outline="red", width=3)
+        draw.text((x1, max(0, y1 - 10)), f"{score:.2f}", fill="red", font=font)
+
+    output = io.BytesIO()
+    image.save(output, format=image_format)
+    return output.getvalue()
+
+
+async def detect(session, semaphore, queue, progress, image_paths):
+    """Stage 1: upload a chunk of images in one request and queue each for annotation."""
+    filenames = [os.path.basename(path) for path in image_paths]
+    images = []
 
-# Loop through all images in the folder
-for filename in os.listdir(image_dir):
-    if filename.lower().endswith((".png", ".jpg", ".jpeg", ".webp")):
-        image_path = os.path.join(image_dir, filename)
+    async with semaphore:
+        try:
+            form = aiohttp.FormData()
+            for image_path, filename in zip(image_paths, filenames):
+                async with aiofiles.open(image_path, "rb") as f:
+                    image_bytes = await f.read()
+                images.append(image_bytes)
+                form.add_field("images", image_bytes, filename=filename)
 
-        # Send POST request
-        with open(image_path, "rb") as f:
-            files = {"image": f}
-            response = requests.post(url, files=files)
+            # Send POST request
+            async with session.post(url, data=form) as response:
+                if response.status != 200:
+                    error = f"{response.status}, {await response.text()}"
+                    for filename in filenames:
+                        log.info(f"❌ Failed for {filename}: {error}")
+                    progress.update(len(filenames))
+                    return
+                results = (await response.json())["results"]
+        except Exception as e:
+            for filename in filenames:
+                log.info(f"❌ Failed for {filename}: {e}")
+            progress.update(len(filenames))
+            return
 
-        # Check response
-        if response.status_code == 200:
-            response_data = response.json()
-            boxes = response_data.get("boxes", [])
-            scores = response_data.get("scores", [])
+    # The batch response holds one result per image, in upload order
+    for filename, image_bytes, result in zip(filenames, images, results):
+        boxes = result.get("boxes", [])
+        scores = result.get("scores", [])
+        await queue.put((filename, image_bytes, boxes, scores))
 
-            # Open image
-            image = Image.open(image_path).convert("RGB")
-            draw = ImageDraw.Draw(image)
 
-            # Draw boxes
-            for box, score in zip(boxes, scores):
-                x1, y1, x2, y2 = box
-                draw.rectangle([x1, y1, x2, y2], outline="red", width=3)
-                draw.text((x1, max(0, y1 - 10)), f"{score:.2f}", fill="red")
+async def annotate_and_save(queue, pool, progress):
+    """Stages 2 and 3: draw boxes in the process pool, then write the result."""
+    loop = asyncio.get_running_loop()
+
+    while True:
+        item = await queue.get()
+        if item is None:
+            break
+
+        filename, image_bytes, boxes, scores = item
+        try:
+            annotated = await loop.run_in_executor(pool, annotate_bytes, image_bytes, boxes, scores)
 
             # Save result
             output_path = os.path.join(output_dir, filename)
-            image.save(output_path)
-            print(f"✅ Saved: {output_path}")
-        else:
-            print(f"❌ Failed for {filename}: {response.status_code}, {response.text}")
\ No newline at end of file
+            async with aiofiles.open(output_path, "wb") as f:
+                await f.write(annotated)
+            log.info(f"✅ Saved: {output_path}")
+        except Exception as e:
+            log.info(f"❌ Failed for {filename}: {e}")
+        progress.update()
+
+
+async def main():
+    # Create output directory if not exists
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Collect all images in the folder
+    with os.scandir(image_dir) as entries:
+        image_paths = [entry.path for entry in entries
+                       if entry.is_file() and os.path.splitext(entry.name)[1].lower() in valid_ext]
+
+    chunks = [image_paths[start:start + batch_size]
+              for start in range(0, len(image_paths), batch_size)]
+    queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(max_concurrent_requests)
+
+    with ProcessPoolExecutor(max_workers=annotate_workers, initializer=init_worker) as pool, \
+            logging_redirect_tqdm(loggers=[log]), \
+            tqdm(total=len(image_paths), desc="Processing", unit="image") as progress:
+        consumers = [asyncio.create_task(annotate_and_save(queue, pool, progress))
+                     for _ in range(annotate_workers)]
+
+        async with aiohttp.ClientSession() as session:
+            await asyncio.gather(*(detect(session, semaphore, queue, progress, chunk)
+                                   for chunk in chunks))
+
+        # Signal the consumers that all uploads are done
+        for _ in consumers:
+            await queue.put(None)
+        await asyncio.gather(*consumers)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
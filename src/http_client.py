@@ -0,0 +1,56 @@
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connection pool sizes for the shared session
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 32
+
+# Transient gateway errors retried by post_with_retry, with exponential backoff
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = frozenset((502, 503, 504))
+
+# urllib3 only retries connection failures, which happen before any body is
+# sent. Status retries for POSTs are done by post_with_retry, because urllib3
+# cannot rewind the one-shot streaming bodies the uploads use.
+RETRY = Retry(
+    total=RETRY_TOTAL,
+    read=False,
+    backoff_factor=RETRY_BACKOFF_FACTOR,
+)
+
+
+def create_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=RETRY,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+def post_with_retry(session, url, make_body):
+    """
+    POST to url, retrying gateway errors with exponential backoff.
+
+    make_body is called before every attempt and returns (data, headers),
+    so streamed bodies are rebuilt instead of re-sent after being drained.
+    """
+    for attempt in range(RETRY_TOTAL + 1):
+        data, headers = make_body()
+        response = session.post(url, data=data, headers=headers)
+        last_attempt = attempt == RETRY_TOTAL
+        if response.status_code not in RETRY_STATUSES or last_attempt:
+            return response
+        time.sleep(RETRY_BACKOFF_FACTOR * (2 ** attempt))
+
+
+# Process-wide session shared by the example and test scripts
+SESSION = create_session()
@@ -50,9 +50,22 @@ class BillRoiPredictor:
         with torch.no_grad():
             predictions = self.model(image_tensor)
         
-        boxes = predictions[0]["boxes"].cpu().numpy()
-        scores = predictions[0]["scores"].cpu().numpy()
-        labels = predictions[0]["labels"].cpu().numpy()
+        return self._postprocess(predictions[0])
+
+    def predict_images(self, images):
+        # Run all images through the model in one forward pass
+        image_tensors = [
+            self._get_transforms(image).to(self.device) for image in images
+        ]
+        with torch.no_grad():
+            predictions = self.model(image_tensors)
+
+        return [self._postprocess(prediction) for prediction in predictions]
+
+    def _postprocess(self, prediction):
+        boxes = prediction["boxes"].cpu().numpy()
+        scores = prediction["scores"].cpu().numpy()
+        labels = prediction["labels"].cpu().numpy()
 
         # Apply confidence threshold to filter valid detections
         valid_detections = scores >= CONFIDENCE_THRESHOLD